@@ -83,6 +83,12 @@ def main():
         default=10,
         help='Tile padding'
     )
+    parser.add_argument(
+        '--tile_batch',
+        type=int,
+        default=4,
+        help='Number of tiles processed per forward pass during tiling'
+    )
     parser.add_argument(
         '--pre_pad',
         type=int,
@@ -100,6 +106,22 @@ def main():
         help='Use fp32 precision during inference. '
              'Default: fp16 (half precision).'
     )
+    parser.add_argument(
+        '--amp',
+        action='store_true',
+        help='Use autocast mixed precision with fp32 weights '
+             'instead of casting the model to fp16'
+    )
+    parser.add_argument(
+        '--bf16',
+        action='store_true',
+        help='Use bfloat16 as the autocast dtype (only with --amp)'
+    )
+    parser.add_argument(
+        '--compile',
+        action='store_true',
+        help='Specialize the model with torch.compile(mode="reduce-overhead")'
+    )
     parser.add_argument(
         '--alpha_upsampler',
         type=str,
@@ -250,9 +272,14 @@ def main():
         model=model,
         tile=args.tile,
         tile_pad=args.tile_pad,
+        tile_batch=args.tile_batch,
         pre_pad=args.pre_pad,
         half=not args.fp32,
-        gpu_id=args.gpu_id
+        amp=args.amp,
+        bf16=args.bf16,
+        compile_model=args.compile,
+        gpu_id=args.gpu_id,
+        outscale=args.outscale
     )
 
     if args.face_enhance:  # Use GFPGAN for face enhancement
@@ -290,7 +317,7 @@ def main():
                     paste_back=True
                 )
             else:
-                output, _ = upsampler.enhance(img, outscale=args.outscale)
+                output, _ = upsampler.enhance(img)
         except RuntimeError as error:
             print('Error', error)
             print('If you encounter CUDA out of memory, '
@@ -2,6 +2,8 @@ import math
 import os
 import queue
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
@@ -9,6 +11,7 @@ import onnxruntime as ort
 import torch
 from basicsr.utils.download_util import load_file_from_url
 from torch.nn import functional as F
+from tqdm import tqdm
 from transformers import AutoModel
 from tritonclient import http as httpclient
 
@@ -30,10 +33,29 @@ class RealESRGANer:
             into one image. 0 denotes for do not use tile. Default: 0.
         tile_pad (int): The pad size for each tile, to remove border artifacts.
             Default: 10.
+        tile_batch (int): Number of tiles that are stacked along the batch
+            dimension and upscaled with a single forward pass during tile
+            processing. Default: 4.
         pre_pad (int): Pad the input images to avoid border artifacts.
             Default: 10.
         half (float): Whether to use half precision during inference.
             Default: False.
+        amp (bool): Run the model under torch.autocast mixed precision
+            instead of permanently casting the weights to half. Keeps fp32
+            master weights (so the CPU fallback keeps working) and lets
+            cuDNN pick the best kernel per op. Takes precedence over half.
+            Default: False.
+        bf16 (bool): Use bfloat16 instead of float16 as the autocast dtype.
+            Only used together with amp. Default: False.
+        compile_model (bool): Specialize the network with
+            torch.compile(mode="reduce-overhead"). Inductor fuses the
+            pointwise chains of the residual blocks and replays the
+            forward through CUDA graphs; recompilation happens once per
+            distinct input shape. Default: False.
+        empty_cache_every_n (int): Release cached GPU memory back to the
+            driver after every N enhanced images. Helps against allocator
+            fragmentation when image sizes vary a lot.
+            None denotes for never release. Default: None.
     """
 
     def __init__(
@@ -44,8 +66,12 @@ class RealESRGANer:
         model=None,
         tile=0,
         tile_pad=10,
+        tile_batch=4,
         pre_pad=10,
         half=False,
+        amp=False,
+        bf16=False,
+        compile_model=False,
         device=None,
         gpu_id=None,
         backend="torch",
@@ -55,12 +81,21 @@ class RealESRGANer:
         triton_model_version=None,
         outscale=None,
         hf_repository=None,
+        empty_cache_every_n=None,
     ):
         self.scale = scale
         self.tile_size = tile
         self.tile_pad = tile_pad
+        self.tile_batch = tile_batch
         self.pre_pad = pre_pad
         self.mod_scale = None
+        self.compile_model = compile_model
+        self.amp = amp
+        self.amp_dtype = torch.bfloat16 if bf16 else torch.float16
+        if self.amp:
+            # autocast keeps fp32 master weights,
+            # a permanent half cast would defeat it
+            half = False
         self.half = half
         self.backend = backend
         self.onnx_path = onnx_path
@@ -68,6 +103,20 @@ class RealESRGANer:
         self.triton_model_name = triton_model_name
         self.triton_model_version = triton_model_version
         self.outscale = outscale
+        self.empty_cache_every_n = empty_cache_every_n
+        self._enhance_count = 0
+
+        # tame caching-allocator fragmentation for the varying shapes seen
+        # across images and alpha passes; users can still override the knob
+        # by exporting PYTORCH_CUDA_ALLOC_CONF themselves
+        if (
+            (self.backend == "torch" or self.backend == "huggingface")
+            and torch.cuda.is_available()
+        ):
+            os.environ.setdefault(
+                "PYTORCH_CUDA_ALLOC_CONF",
+                "expandable_segments:True,max_split_size_mb:512",
+            )
 
         # initialize model torch backend
         if self.backend == "torch":
@@ -100,7 +149,14 @@ class RealESRGANer:
                         progress=True,
                         file_name=None,
                     )
-                loadnet = torch.load(model_path, map_location=torch.device("cpu"))
+                # mmap the checkpoint and restore straight to the target
+                # device instead of materializing a full CPU copy first
+                loadnet = torch.load(
+                    model_path,
+                    map_location=self.device,
+                    mmap=True,
+                    weights_only=True,
+                )
 
             # prefer to use params_ema
             if "params_ema" in loadnet:
@@ -114,19 +170,65 @@ class RealESRGANer:
             if self.half:
                 self.net_g = self.net_g.half()
             self.dtype = torch.float16 if self.half else torch.float32
+            if self.device.type == "cuda":
+                # NHWC lets cuDNN pick tensor-core friendly conv kernels,
+                # and tile shapes are stable enough for kernel autotuning
+                self.net_g = self.net_g.to(memory_format=torch.channels_last)
+                torch.backends.cudnn.benchmark = True
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+            if self.compile_model:
+                # reduce-overhead replays through CUDA graphs on its own,
+                # so process() skips the manual graph capture in this case
+                self.net_g = torch.compile(
+                    self.net_g, mode="reduce-overhead", dynamic=False
+                )
+            # CUDA graphs captured per input shape, see _process_cuda_graph;
+            # the cache is bounded and shapes must repeat before capture
+            self._cuda_graphs = {}
+            self._graph_shape_seen = {}
+            self._graph_cache_size = 4
+            self._graph_capture_failed = False
+            # flat output buffer reused across images, see tile_process
+            self._out_buf = None
+            # pinned staging buffers and persistent transfer streams,
+            # see _to_device_async and _post_to_numpy
+            self._pinned_buf = None
+            self._pinned_out = None
+            if self.device.type == "cuda":
+                self._copy_stream = torch.cuda.Stream(device=self.device)
+                self._down_stream = torch.cuda.Stream(device=self.device)
+            else:
+                self._copy_stream = None
+                self._down_stream = None
         elif self.backend == "onnx":
             self.ort_session = ort.InferenceSession(
                 self.onnx_path,
                 providers=[
                     "TensorrtExecutionProvider",
-                    "CUDAExecutionProvider",
+                    (
+                        "CUDAExecutionProvider",
+                        # grow the CUDA arena by what was requested instead
+                        # of doubling, keeps the pool from over-reserving
+                        {"arena_extend_strategy": "kSameAsRequested"},
+                    ),
                     "CPUExecutionProvider",
                 ],
             )
             self.ort_input_name = self.ort_session.get_inputs()[0].name
             self.ort_output_name = self.ort_session.get_outputs()[0].name
+            # reusable IOBinding state, see _process_onnx
+            self._ort_use_cuda = (
+                "CUDAExecutionProvider" in self.ort_session.get_providers()
+            )
+            self._io_binding = self.ort_session.io_binding()
+            self._ort_in = None
+            # scratch buffer for the final quantization, see enhance
+            self._quant_buf = None
         elif self.backend == "triton":
             self.triton_client = httpclient.InferenceServerClient(url=self.triton_url)
+            # scratch buffer for the final quantization, see enhance
+            self._quant_buf = None
         elif self.backend == "huggingface":
             if gpu_id is not None and gpu_id != -1:
                 if device is None:
@@ -148,63 +250,149 @@ class RealESRGANer:
             if self.half:
                 self.net_g = self.net_g.half()
             self.dtype = torch.float16 if self.half else torch.float32
+            if self.device.type == "cuda":
+                # NHWC lets cuDNN pick tensor-core friendly conv kernels,
+                # and tile shapes are stable enough for kernel autotuning
+                self.net_g = self.net_g.to(memory_format=torch.channels_last)
+                torch.backends.cudnn.benchmark = True
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+            if self.compile_model:
+                self.net_g = torch.compile(
+                    self.net_g, mode="reduce-overhead", dynamic=False
+                )
+            # flat output buffer reused across images, see tile_process
+            self._out_buf = None
+            # pinned staging buffers and persistent transfer streams,
+            # see _to_device_async and _post_to_numpy
+            self._pinned_buf = None
+            self._pinned_out = None
+            if self.device.type == "cuda":
+                self._copy_stream = torch.cuda.Stream(device=self.device)
+                self._down_stream = torch.cuda.Stream(device=self.device)
+            else:
+                self._copy_stream = None
+                self._down_stream = None
         else:
             raise ValueError(f"The {self.backend} backend isn't supported")
 
-    def dni(self, net_a, net_b, dni_weight, key="params", loc="cpu"):
+    def dni(self, net_a, net_b, dni_weight, key="params", loc=None):
         """Deep network interpolation.
 
+        Both checkpoints are mmapped and restored on the target device,
+        and the interpolation is fused in-place so no second full copy of
+        the weights is allocated.
+
         Paper:
             Deep Network Interpolation for Continuous Imagery Effect Transition
         """
-        net_a = torch.load(net_a, map_location=torch.device(loc))
-        net_b = torch.load(net_b, map_location=torch.device(loc))
-        for k, v_a in net_a[key].items():
-            net_a[key][k] = dni_weight[0] * v_a + dni_weight[1] * net_b[key][k]
+        loc = self.device if loc is None else torch.device(loc)
+        net_a = torch.load(net_a, map_location=loc, mmap=True, weights_only=True)
+        net_b = torch.load(net_b, map_location=loc, mmap=True, weights_only=True)
+        # blend all parameter tensors with two multi-tensor-apply calls
+        # instead of launching two kernels per state dict entry
+        a_list = list(net_a[key].values())
+        b_list = [net_b[key][k] for k in net_a[key]]
+        torch._foreach_mul_(a_list, dni_weight[0])
+        torch._foreach_add_(a_list, b_list, alpha=dni_weight[1])
         return net_a
 
     def pre_process_numpy(self, img):
         """Pre-process such as pre-pad and mod pad,
         so that the images can be divisible using numpy
+
+        The pre-pad and the mod-pad are merged into a single np.pad call,
+        so the array is swept (and copied) once instead of twice.
         """
         img = np.transpose(img, (2, 0, 1))
         img = np.expand_dims(img, axis=0)
-        self.img = img.astype(np.float16) if self.half else img
-
-        # pre_pad
-        if self.pre_pad != 0:
-            self.img = np.pad(
-                self.img,
-                ((0, 0), (0, 0), (0, self.pre_pad), (0, self.pre_pad)),
-                mode="reflect",
-            )
+        img = img.astype(np.float16) if self.half else img
 
-        # mod pad for divisible borders
+        # mod pad for divisible borders, computed on the pre-padded size
         if self.scale == 2:
             self.mod_scale = 2
         elif self.scale == 1:
             self.mod_scale = 4
+        self.mod_pad_h, self.mod_pad_w = 0, 0
         if self.mod_scale is not None:
-            self.mod_pad_h, self.mod_pad_w = 0, 0
-            _, _, h, w = self.img.shape
+            _, _, h, w = img.shape
+            h, w = h + self.pre_pad, w + self.pre_pad
             if h % self.mod_scale != 0:
                 self.mod_pad_h = self.mod_scale - h % self.mod_scale
             if w % self.mod_scale != 0:
                 self.mod_pad_w = self.mod_scale - w % self.mod_scale
-            self.img = np.pad(
-                self.img,
-                ((0, 0), (0, 0), (0, self.mod_pad_h), (0, self.mod_pad_w)),
-                "reflect",
+
+        # apply pre-pad and mod-pad together
+        pad_h = self.pre_pad + self.mod_pad_h
+        pad_w = self.pre_pad + self.mod_pad_w
+        if pad_h != 0 or pad_w != 0:
+            img = np.pad(
+                img,
+                ((0, 0), (0, 0), (0, pad_h), (0, pad_w)),
+                mode="reflect",
             )
+        self.img = np.ascontiguousarray(img)
+
+    def _to_device_async(self, img):
+        """Copy a CHW numpy image to the GPU through a pinned staging buffer.
 
-    def pre_process(self, img):
+        The host-to-device transfer is issued on a dedicated copy stream
+        with non_blocking=True, so it does not block the host and can
+        overlap with work already queued on the current stream. The current
+        stream is synchronized with the copy before the tensor is used.
+        """
+        src = torch.from_numpy(img)
+        numel = src.numel()
+        if (
+            self._pinned_buf is None
+            or self._pinned_buf.numel() < numel
+            or self._pinned_buf.dtype != src.dtype
+        ):
+            self._pinned_buf = torch.empty(
+                numel, dtype=src.dtype, pin_memory=True
+            )
+        # the previous upload from this buffer may still be in flight on
+        # the copy stream; wait for it before overwriting the staging area
+        self._copy_stream.synchronize()
+        staging = self._pinned_buf[:numel].view_as(src)
+        staging.copy_(src)
+
+        current_stream = torch.cuda.current_stream(self.device)
+        self._copy_stream.wait_stream(current_stream)
+        with torch.cuda.stream(self._copy_stream):
+            out = staging.to(self.device, non_blocking=True)
+        current_stream.wait_stream(self._copy_stream)
+        out.record_stream(current_stream)
+        return out
+
+    def pre_process(self, img, max_range=255):
         """Pre-process, such as pre-pad and mod pad,
         so that the images can be divisible
+
+        The raw HWC image is uploaded as-is; the BGR->RGB reorder, the
+        CHW transpose and the normalization by max_range all run on the
+        device, so the CPU does not sweep the pixel buffer at all.
         """
-        img = torch.from_numpy(np.transpose(img, (2, 0, 1))).float()
-        self.img = img.unsqueeze(0).to(self.device)
-        if self.half:
-            self.img = self.img.half()
+        img = np.ascontiguousarray(img)
+        if img.dtype == np.uint16:
+            # torch cannot upload uint16 directly
+            img = img.astype(np.int32)
+        if self._copy_stream is not None:
+            img = self._to_device_async(img)
+        else:
+            img = torch.from_numpy(img).to(self.device)
+
+        # BGR -> RGB, HWC -> CHW and normalization in one device pass
+        self.img = (
+            img[:, :, [2, 1, 0]]
+            .permute(2, 0, 1)
+            .unsqueeze(0)
+            .to(torch.float32)
+            .div_(max_range)
+            .to(self.dtype)
+        )
+        if self.img.is_cuda:
+            self.img = self.img.contiguous(memory_format=torch.channels_last)
 
         # pre_pad
         if self.pre_pad != 0:
@@ -226,15 +414,110 @@ class RealESRGANer:
                 self.img, (0, self.mod_pad_w, 0, self.mod_pad_h), "reflect"
             )
 
+    def _process_onnx(self):
+        """Run the ONNX session through IOBinding with reusable buffers.
+
+        The input OrtValue lives on the device and is updated in place
+        whenever the shape matches the previous call, and the output is
+        bound to the device as well, so onnxruntime does not allocate
+        fresh buffers or do implicit host round-trips on every run.
+        """
+        device = "cuda" if self._ort_use_cuda else "cpu"
+        if (
+            self._ort_in is not None
+            and tuple(self._ort_in.shape()) == self.img.shape
+        ):
+            self._ort_in.update_inplace(self.img)
+        else:
+            self._ort_in = ort.OrtValue.ortvalue_from_numpy(self.img, device, 0)
+
+        self._io_binding.clear_binding_inputs()
+        self._io_binding.clear_binding_outputs()
+        self._io_binding.bind_ortvalue_input(self.ort_input_name, self._ort_in)
+        self._io_binding.bind_output(self.ort_output_name, device, 0)
+        self.ort_session.run_with_iobinding(self._io_binding)
+        return self._io_binding.get_outputs()[0].numpy()
+
+    def _forward(self, x):
+        """Eager forward through net_g with the configured precision."""
+        with torch.inference_mode():
+            if self.amp and x.is_cuda:
+                with torch.autocast("cuda", dtype=self.amp_dtype):
+                    return self.net_g(x)
+            return self.net_g(x)
+
+    def _process_cuda_graph(self):
+        """Run net_g through a CUDA graph captured per input shape.
+
+        The first call for a shape records the kernel sequence of the
+        forward pass into a ``torch.cuda.CUDAGraph``. Subsequent calls with
+        the same shape only copy the input into the static buffer and
+        replay the graph, which removes the per-kernel launch latency and
+        Python overhead of the eager forward.
+        """
+        key = tuple(self.img.shape)
+        if key in self._cuda_graphs:
+            # refresh the LRU position of the replayed graph
+            self._cuda_graphs[key] = self._cuda_graphs.pop(key)
+        else:
+            # only capture shapes that repeat; folder inference over
+            # heterogeneous sizes would otherwise pay warmup plus capture
+            # and retain static buffers for shapes seen a single time
+            seen = self._graph_shape_seen.get(key, 0) + 1
+            self._graph_shape_seen[key] = seen
+            if seen < 2:
+                return self._forward(self.img)
+
+            try:
+                static_input = torch.empty_like(self.img)
+                static_input.copy_(self.img)
+
+                # warmup on a side stream before capture
+                stream = torch.cuda.Stream(device=self.device)
+                stream.wait_stream(torch.cuda.current_stream(self.device))
+                with torch.cuda.stream(stream), torch.inference_mode():
+                    for _ in range(3):
+                        static_output = self.net_g(static_input)
+                torch.cuda.current_stream(self.device).wait_stream(stream)
+
+                graph = torch.cuda.CUDAGraph()
+                with torch.cuda.graph(graph), torch.inference_mode():
+                    static_output = self.net_g(static_input)
+            except RuntimeError as error:
+                # capture is not supported in every configuration, e.g.
+                # together with expandable_segments on some torch versions
+                print("CUDA graph capture failed, staying eager:", error)
+                self._graph_capture_failed = True
+                return self._forward(self.img)
+
+            # keep the cache bounded; evict the least recently used graph
+            # together with its static buffers and private memory pool
+            while len(self._cuda_graphs) >= self._graph_cache_size:
+                self._cuda_graphs.pop(next(iter(self._cuda_graphs)))
+            self._cuda_graphs[key] = (graph, static_input, static_output)
+
+        graph, static_input, static_output = self._cuda_graphs[key]
+        static_input.copy_(self.img)
+        graph.replay()
+        return static_output
+
     def process(self):
         # model inference
         if self.backend == "torch":
-            self.output = self.net_g(self.img)
+            if (
+                self.img.is_cuda
+                and not self.amp
+                and not self.compile_model
+                and not self._graph_capture_failed
+            ):
+                self.output = self._process_cuda_graph()
+            else:
+                # autocast and compiled models take the eager path:
+                # autocast does not mix well with manual graph capture and
+                # torch.compile(mode="reduce-overhead") graphs on its own
+                self.output = self._forward(self.img)
         elif self.backend == "onnx":
-            self.output = self.ort_session.run(
-                [self.ort_output_name],
-                {self.ort_input_name: self.img},
-            )[0]
+            self.output = self._process_onnx()
         elif self.backend == "triton":
             dtype = "FP16" if self.half else "FP32"
 
@@ -249,10 +532,49 @@ class RealESRGANer:
                 outputs=outputs,
             ).as_numpy("hr")
         elif self.backend == "huggingface":
-            self.output = self.net_g(self.img)
+            self.output = self._forward(self.img)
         else:
             raise ValueError(f"The {self.backend} backend isn't supported")
 
+    def _tile_coord_groups(self, height, width):
+        """Precompute the coordinates of all tiles for an input image.
+
+        Returns a dict mapping the padded tile shape to the list of
+        coordinate tuples of the tiles with that shape, so tile_process
+        can batch same-shaped tiles without recomputing any bounds in
+        the hot loop.
+        """
+        tile_groups = {}
+        for y in range(math.ceil(height / self.tile_size)):
+            for x in range(math.ceil(width / self.tile_size)):
+                # input tile area on total image
+                input_start_x = x * self.tile_size
+                input_end_x = min(input_start_x + self.tile_size, width)
+                input_start_y = y * self.tile_size
+                input_end_y = min(input_start_y + self.tile_size, height)
+
+                # input tile area on total image with padding
+                input_start_x_pad = max(input_start_x - self.tile_pad, 0)
+                input_end_x_pad = min(input_end_x + self.tile_pad, width)
+                input_start_y_pad = max(input_start_y - self.tile_pad, 0)
+                input_end_y_pad = min(input_end_y + self.tile_pad, height)
+
+                shape_key = (
+                    input_end_y_pad - input_start_y_pad,
+                    input_end_x_pad - input_start_x_pad,
+                )
+                tile_groups.setdefault(shape_key, []).append((
+                    input_start_x,
+                    input_end_x,
+                    input_start_y,
+                    input_end_y,
+                    input_start_x_pad,
+                    input_end_x_pad,
+                    input_start_y_pad,
+                    input_end_y_pad,
+                ))
+        return tile_groups
+
     def tile_process(self):
         """It will first crop input images to tiles,
             and then process each tile.
@@ -270,69 +592,112 @@ class RealESRGANer:
         output_width = width * self.scale
         output_shape = (batch, channel, output_height, output_width)
 
-        # start with black image
-        self.output = self.img.new_zeros(output_shape)
+        # view a single grow-on-demand flat buffer as this image's output,
+        # so folder inference over heterogeneous sizes holds on to at most
+        # one output-sized allocation; zeroed per image so that tiles
+        # skipped on error come out black instead of leaking stale pixels
+        numel = batch * channel * output_height * output_width
+        if self._out_buf is None or self._out_buf.numel() < numel:
+            self._out_buf = self.img.new_empty(numel)
+        self.output = self._out_buf[:numel].view(output_shape).zero_()
         tiles_x = math.ceil(width / self.tile_size)
         tiles_y = math.ceil(height / self.tile_size)
+        tile_groups = self._tile_coord_groups(height, width)
 
-        # loop over all tiles
-        for y in range(tiles_y):
-            for x in range(tiles_x):
-                # extract tile from input image
-                ofs_x = x * self.tile_size
-                ofs_y = y * self.tile_size
-                # input tile area on total image
-                input_start_x = ofs_x
-                input_end_x = min(ofs_x + self.tile_size, width)
-                input_start_y = ofs_y
-                input_end_y = min(ofs_y + self.tile_size, height)
-
-                # input tile area on total image with padding
-                input_start_x_pad = max(input_start_x - self.tile_pad, 0)
-                input_end_x_pad = min(input_end_x + self.tile_pad, width)
-                input_start_y_pad = max(input_start_y - self.tile_pad, 0)
-                input_end_y_pad = min(input_end_y + self.tile_pad, height)
+        # upscale the tiles of each group in mini-batches of tile_batch,
+        # so that one forward pass covers several tiles; progress is
+        # reported per mini-batch, outside of the CUDA-critical region
+        pbar = tqdm(total=tiles_x * tiles_y, unit="tile", leave=False)
+        for group in tile_groups.values():
+            for start in range(0, len(group), self.tile_batch):
+                chunk = group[start:start + self.tile_batch]
+                input_tiles = torch.cat(
+                    [
+                        self.img[
+                            :,
+                            :,
+                            input_start_y_pad:input_end_y_pad,
+                            input_start_x_pad:input_end_x_pad,
+                        ]
+                        for (
+                            _,
+                            _,
+                            _,
+                            _,
+                            input_start_x_pad,
+                            input_end_x_pad,
+                            input_start_y_pad,
+                            input_end_y_pad,
+                        ) in chunk
+                    ],
+                    dim=0,
+                )
+                if input_tiles.is_cuda:
+                    input_tiles = input_tiles.contiguous(
+                        memory_format=torch.channels_last
+                    )
 
-                # input tile dimensions
-                input_tile_width = input_end_x - input_start_x
-                input_tile_height = input_end_y - input_start_y
-                tile_idx = y * tiles_x + x + 1
-                input_tile = self.img[
-                    :,
-                    :,
-                    input_start_y_pad:input_end_y_pad,
-                    input_start_x_pad:input_end_x_pad,
-                ]
-
-                # upscale tile
+                # upscale tiles
                 try:
-                    with torch.no_grad():
-                        output_tile = self.net_g(input_tile)
+                    output_tiles = self._forward(input_tiles)
                 except RuntimeError as error:
                     print("Error", error)
-                print(f"\tTile {tile_idx}/{tiles_x * tiles_y}")
-
-                # output tile area on total image
-                output_start_x = input_start_x * self.scale
-                output_end_x = input_end_x * self.scale
-                output_start_y = input_start_y * self.scale
-                output_end_y = input_end_y * self.scale
-
-                # output tile area without padding
-                output_start_x_tile = (input_start_x - input_start_x_pad) * self.scale
-                output_end_x_tile = output_start_x_tile + input_tile_width * self.scale
-                output_start_y_tile = (input_start_y - input_start_y_pad) * self.scale
-                output_end_y_tile = output_start_y_tile + input_tile_height * self.scale
-
-                # put tile into output image
-                self.output[
-                    :, :, output_start_y:output_end_y, output_start_x:output_end_x
-                ] = output_tile[
-                    :,
-                    :,
-                    output_start_y_tile:output_end_y_tile,
-                    output_start_x_tile:output_end_x_tile,
-                ]
+                    # the output view is zeroed per image, so the skipped
+                    # tiles come out black instead of leaking stale pixels
+                    pbar.update(len(chunk))
+                    continue
+
+                for idx, (
+                    input_start_x,
+                    input_end_x,
+                    input_start_y,
+                    input_end_y,
+                    input_start_x_pad,
+                    input_end_x_pad,
+                    input_start_y_pad,
+                    input_end_y_pad,
+                ) in enumerate(chunk):
+                    output_tile = output_tiles[idx * batch:(idx + 1) * batch]
+
+                    # input tile dimensions
+                    input_tile_width = input_end_x - input_start_x
+                    input_tile_height = input_end_y - input_start_y
+
+                    # output tile area on total image
+                    output_start_x = input_start_x * self.scale
+                    output_end_x = input_end_x * self.scale
+                    output_start_y = input_start_y * self.scale
+                    output_end_y = input_end_y * self.scale
+
+                    # output tile area without padding
+                    output_start_x_tile = (
+                        input_start_x - input_start_x_pad
+                    ) * self.scale
+                    output_end_x_tile = (
+                        output_start_x_tile + input_tile_width * self.scale
+                    )
+                    output_start_y_tile = (
+                        input_start_y - input_start_y_pad
+                    ) * self.scale
+                    output_end_y_tile = (
+                        output_start_y_tile + input_tile_height * self.scale
+                    )
+
+                    # put tile into output image
+                    self.output[
+                        :,
+                        :,
+                        output_start_y:output_end_y,
+                        output_start_x:output_end_x,
+                    ] = output_tile[
+                        :,
+                        :,
+                        output_start_y_tile:output_end_y_tile,
+                        output_start_x_tile:output_end_x_tile,
+                    ]
+
+                pbar.update(len(chunk))
+        pbar.close()
 
     def post_process(self):
         # remove extra pad
@@ -355,17 +720,57 @@ class RealESRGANer:
             ]
         return self.output
 
-    @torch.no_grad()
+    def _post_to_numpy(self, output, max_range):
+        """Quantize the model output on the device and download it.
+
+        The clamp, scaling, rounding, RGB->BGR reorder and integer cast
+        all run where the output lives, so only the final uint8/uint16
+        buffer (4x/2x smaller than float32) is transferred to the host.
+        """
+        out = output.data.squeeze(0).to(torch.float32)
+        out = out.clamp_(0, 1).mul_(max_range).round_()
+        # reorder while still float32 -- the integer cast comes last since
+        # uint16 only has guaranteed creation/copy kernels
+        out = out[[2, 1, 0]].permute(1, 2, 0).contiguous()
+        out = out.to(torch.uint8 if max_range == 255 else torch.uint16)
+        if not out.is_cuda:
+            return out.numpy()
+
+        # download through a reusable pinned buffer on the dedicated
+        # stream, avoiding a fresh pageable host allocation per image
+        numel = out.numel()
+        if (
+            self._pinned_out is None
+            or self._pinned_out.numel() < numel
+            or self._pinned_out.dtype != out.dtype
+        ):
+            self._pinned_out = torch.empty(
+                numel, dtype=out.dtype, pin_memory=True
+            )
+        host = self._pinned_out[:numel].view_as(out)
+        self._down_stream.wait_stream(torch.cuda.current_stream(self.device))
+        with torch.cuda.stream(self._down_stream):
+            host.copy_(out, non_blocking=True)
+        self._down_stream.synchronize()
+        # the staging buffer is reused for the next image,
+        # so hand out a copy
+        return host.numpy().copy()
+
+    @torch.inference_mode()
     def enhance(self, img, alpha_upsampler="realesrgan"):
         h_input, w_input = img.shape[0:2]
-        # img: numpy
-        img = img.astype(np.float32)
-        if np.max(img) > 256:  # 16-bit image
+        # img: numpy; the dtype tells the bit depth for free,
+        # without an extra full sweep over the pixels
+        if img.dtype == np.uint16:  # 16-bit image
             max_range = 65535
             print("\tInput is a 16-bit image")
         else:
             max_range = 255
-        img = img / max_range
+        # the torch backends fuse normalization and the BGR->RGB reorder
+        # into pre_process on the device, so the image stays raw for them
+        use_torch_pre = self.backend == "torch" or self.backend == "huggingface"
+        if not use_torch_pre:
+            img = img.astype(np.float32) / max_range
         if len(img.shape) == 2:  # gray image
             img_mode = "L"
             img = cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
@@ -373,99 +778,157 @@ class RealESRGANer:
             img_mode = "RGBA"
             alpha = img[:, :, 3]
             img = img[:, :, 0:3]
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            if not use_torch_pre:
+                # a reversed view instead of a cvtColor copy; the copy that
+                # must happen anyway is absorbed by pre_process_numpy
+                img = img[:, :, ::-1]
             if alpha_upsampler == "realesrgan":
                 alpha = cv2.cvtColor(alpha, cv2.COLOR_GRAY2RGB)
         else:
             img_mode = "RGB"
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            if not use_torch_pre:
+                # a reversed view instead of a cvtColor copy; the copy that
+                # must happen anyway is absorbed by pre_process_numpy
+                img = img[:, :, ::-1]
+
+        # the torch backends upscale the alpha channel in the same forward
+        # as the RGB image by stacking it along the batch dim,
+        # instead of paying for a second full pass through the model
+        batch_alpha = (
+            img_mode == "RGBA"
+            and alpha_upsampler == "realesrgan"
+            and use_torch_pre
+        )
 
         # ---------- process image (without the alpha channel) ---------- #
         if self.backend == "torch":
-            self.pre_process(img)
+            self.pre_process(img, max_range)
         elif self.backend == "onnx":
             self.pre_process_numpy(img)
         elif self.backend == "triton":
             self.pre_process_numpy(img)
         elif self.backend == "huggingface":
-            self.pre_process(img)
+            self.pre_process(img, max_range)
         else:
             raise ValueError(f"The {self.backend} backend isn't supported")
 
+        if batch_alpha:
+            rgb = self.img
+            self.pre_process(alpha, max_range)
+            self.img = torch.cat([rgb, self.img], dim=0)
+
         if self.tile_size > 0:
             self.tile_process()
         else:
             self.process()
 
         output_img = self.post_process()
-        if self.backend == "torch":
-            output_img = output_img.data.squeeze().float().cpu().clamp_(0, 1).numpy()
+        if use_torch_pre:
+            if self.outscale is not None and self.outscale != float(self.scale):
+                # antialiased bicubic resize on the device replaces the
+                # single-threaded CPU Lanczos pass over the upscaled image
+                output_img = F.interpolate(
+                    output_img.to(torch.float32),
+                    size=(
+                        int(h_input * self.outscale),
+                        int(w_input * self.outscale),
+                    ),
+                    mode="bicubic",
+                    align_corners=False,
+                    antialias=True,
+                )
+            # quantized HWC BGR uint8/uint16, straight from the device
+            if batch_alpha:
+                output_alpha = self._post_to_numpy(output_img[1:2], max_range)
+                output_alpha = cv2.cvtColor(output_alpha, cv2.COLOR_BGR2GRAY)
+                output_img = self._post_to_numpy(output_img[0:1], max_range)
+            else:
+                output_img = self._post_to_numpy(output_img, max_range)
         elif self.backend == "onnx":
             output_img = output_img.squeeze().astype(np.float32).clip(0, 1)
+            output_img = np.transpose(output_img, (1, 2, 0))[:, :, ::-1]
         elif self.backend == "triton":
             output_img = output_img.squeeze().astype(np.float32).clip(0, 1)
-        elif self.backend == "huggingface":
-            output_img = output_img.data.squeeze().float().cpu().clamp_(0, 1).numpy()
+            output_img = np.transpose(output_img, (1, 2, 0))[:, :, ::-1]
         else:
             raise ValueError(f"The {self.backend} backend isn't supported")
-        output_img = np.transpose(output_img[[2, 1, 0], :, :], (1, 2, 0))
         if img_mode == "L":
-            output_img = cv2.cvtColor(output_img, cv2.COLOR_BGR2GRAY)
+            output_img = cv2.cvtColor(
+                np.ascontiguousarray(output_img), cv2.COLOR_BGR2GRAY
+            )
 
         # ------------- process the alpha channel if necessary -------------- #
         if img_mode == "RGBA":
             if alpha_upsampler == "realesrgan":
-                if self.backend == "torch":
-                    self.pre_process(alpha)
-                elif self.backend == "onnx":
+                # the torch backends already upscaled alpha
+                # inside the batched forward above
+                if not batch_alpha:
                     self.pre_process_numpy(alpha)
-                elif self.backend == "triton":
-                    self.pre_process_numpy(alpha)
-                elif self.backend == "huggingface":
-                    self.pre_process(alpha)
-                else:
-                    raise ValueError(f"The {self.backend} backend isn't supported")
 
-                if self.tile_size > 0:
-                    self.tile_process()
-                else:
-                    self.process()
-                output_alpha = self.post_process()
-
-                if self.backend == "torch":
-                    output_alpha = output_alpha.data.squeeze()
-                    output_alpha = output_alpha.float().cpu().clamp_(0, 1).numpy()
-                elif self.backend == "onnx":
-                    output_alpha = output_alpha.squeeze().astype(np.float32).clip(0, 1)
-                elif self.backend == "triton":
-                    output_alpha = output_alpha.squeeze().astype(np.float32).clip(0, 1)
-                elif self.backend == "huggingface":
-                    output_alpha = output_alpha.data.squeeze()
-                    output_alpha = output_alpha.float().cpu().clamp_(0, 1).numpy()
-                else:
-                    raise ValueError(f"The {self.backend} backend isn't supported")
+                    if self.tile_size > 0:
+                        self.tile_process()
+                    else:
+                        self.process()
+                    output_alpha = self.post_process()
 
-                output_alpha = np.transpose(output_alpha[[2, 1, 0], :, :], (1, 2, 0))
-                output_alpha = cv2.cvtColor(output_alpha, cv2.COLOR_BGR2GRAY)
+                    output_alpha = (
+                        output_alpha.squeeze().astype(np.float32).clip(0, 1)
+                    )
+                    output_alpha = np.transpose(output_alpha, (1, 2, 0))
+                    output_alpha = cv2.cvtColor(
+                        np.ascontiguousarray(output_alpha), cv2.COLOR_BGR2GRAY
+                    )
             else:  # use the cv2 resize for alpha channel
                 h, w = alpha.shape[0:2]
+                if (
+                    use_torch_pre
+                    and self.outscale is not None
+                    and self.outscale != float(self.scale)
+                ):
+                    # the torch backends already resized the RGB output to
+                    # the final outscale size on the device
+                    target = (
+                        int(w_input * self.outscale),
+                        int(h_input * self.outscale),
+                    )
+                else:
+                    target = (w * self.scale, h * self.scale)
                 output_alpha = cv2.resize(
                     alpha,
-                    (w * self.scale, h * self.scale),
+                    target,
                     interpolation=cv2.INTER_LINEAR,
                 )
+                # for the torch backends alpha stayed in the raw integer
+                # range, which matches the already quantized output_img
 
             # merge the alpha channel
-            output_img = cv2.cvtColor(output_img, cv2.COLOR_BGR2BGRA)
+            output_img = cv2.cvtColor(
+                np.ascontiguousarray(output_img), cv2.COLOR_BGR2BGRA
+            )
             output_img[:, :, 3] = output_alpha
 
         # ----------------------------- return ----------------------------- #
-        if max_range == 65535:  # 16-bit image
-            output = (output_img * 65535.0).round().astype(np.uint16)
+        if use_torch_pre:
+            # already quantized on the device
+            output = output_img
         else:
-            output = (output_img * 255.0).round().astype(np.uint8)
+            # quantize through a reusable scratch buffer so no transient
+            # float copies of the full upscaled image are allocated
+            if (
+                self._quant_buf is None
+                or self._quant_buf.shape != output_img.shape
+            ):
+                self._quant_buf = np.empty(output_img.shape, dtype=np.float32)
+            np.multiply(output_img, float(max_range), out=self._quant_buf)
+            np.rint(self._quant_buf, out=self._quant_buf)
+            out_dtype = np.uint16 if max_range == 65535 else np.uint8
+            output = self._quant_buf.astype(out_dtype, copy=False)
 
-        if self.outscale is not None and self.outscale != float(self.scale):
+        if (
+            self.outscale is not None
+            and self.outscale != float(self.scale)
+            and not use_torch_pre
+        ):
             output = cv2.resize(
                 output,
                 (
@@ -475,28 +938,71 @@ class RealESRGANer:
                 interpolation=cv2.INTER_LANCZOS4,
             )
 
+        # periodically hand cached blocks back to the driver
+        if self.empty_cache_every_n and torch.cuda.is_available():
+            self._enhance_count += 1
+            if self._enhance_count % self.empty_cache_every_n == 0:
+                torch.cuda.empty_cache()
+
         return output, img_mode
 
 
 class PrefetchReader(threading.Thread):
-    """Prefetch images.
+    """Prefetch images with a pool of decode workers.
+
+    Several images are read and decoded in parallel worker threads, so the
+    JPEG/PNG decode can overlap with GPU inference instead of serializing
+    behind a single reader thread. Results are yielded in the original
+    order and the bounded queue keeps memory usage in check.
 
     Args:
         img_list (list[str]): A image list of image paths to be read.
         num_prefetch_queue (int): Number of prefetch queue.
+        num_readers (int): Number of decode worker threads. Default: 4.
     """
 
-    def __init__(self, img_list, num_prefetch_queue):
+    def __init__(self, img_list, num_prefetch_queue, num_readers=4):
         super().__init__()
         self.que = queue.Queue(num_prefetch_queue)
         self.img_list = img_list
+        self.num_readers = num_readers
 
-    def run(self):
-        for img_path in self.img_list:
-            img = cv2.imread(img_path, cv2.IMREAD_UNCHANGED)
-            self.que.put(img)
+    @staticmethod
+    def _read_img(img_path):
+        # read the raw bytes first so the file I/O
+        # does not serialize inside the OpenCV decode call
+        data = np.fromfile(img_path, dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
 
-        self.que.put(None)
+    def _put_result(self, img_path, future):
+        try:
+            img = future.result()
+        except Exception as error:
+            # an unreadable path must not kill the reader thread,
+            # consumers would block on the queue forever; skip it
+            print(f"Failed to read {img_path}: {error}")
+            return
+        if img is None:
+            # cv2.imdecode returns None for corrupt or truncated files
+            # without raising; enqueueing it would look like the
+            # end-of-stream sentinel to consumers, so skip it as well
+            print(f"Failed to decode {img_path}")
+            return
+        self.que.put(img)
+
+    def run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.num_readers) as pool:
+                pending = deque()
+                for img_path in self.img_list:
+                    pending.append((img_path, pool.submit(self._read_img, img_path)))
+                    # keep at most num_readers decodes in flight
+                    if len(pending) >= self.num_readers:
+                        self._put_result(*pending.popleft())
+                while pending:
+                    self._put_result(*pending.popleft())
+        finally:
+            self.que.put(None)
 
     def __next__(self):
         next_item = self.que.get()
@@ -509,11 +1015,21 @@ class PrefetchReader(threading.Thread):
 
 
 class IOConsumer(threading.Thread):
-    def __init__(self, opt, que, qid):
+    """Encode result images off the main thread.
+
+    Images are compressed with cv2.imencode; if a write_queue is given the
+    encoded bytes are handed over to an IOWriter so the disk flush of one
+    image overlaps with the encode of the next, otherwise the worker
+    writes the bytes itself. The message may carry an explicit "ext" key,
+    by default the extension of save_path is used.
+    """
+
+    def __init__(self, opt, que, qid, write_queue=None):
         super().__init__()
         self._queue = que
         self.qid = qid
         self.opt = opt
+        self._write_queue = write_queue
 
     def run(self):
         while True:
@@ -523,5 +1039,33 @@ class IOConsumer(threading.Thread):
 
             output = msg["output"]
             save_path = msg["save_path"]
-            cv2.imwrite(save_path, output)
+            ext = msg.get("ext") or os.path.splitext(save_path)[1]
+            success, buf = cv2.imencode(ext, output)
+            if not success:
+                print(f"Failed to encode {save_path}")
+                continue
+            if self._write_queue is not None:
+                self._write_queue.put({"save_path": save_path, "buf": buf})
+            else:
+                with open(save_path, "wb") as f:
+                    f.write(buf.tobytes())
         print(f"IO worker {self.qid} is done.")
+
+
+class IOWriter(threading.Thread):
+    """Flush images encoded by IOConsumer to disk."""
+
+    def __init__(self, que, qid):
+        super().__init__()
+        self._queue = que
+        self.qid = qid
+
+    def run(self):
+        while True:
+            msg = self._queue.get()
+            if isinstance(msg, str) and msg == "quit":
+                break
+
+            with open(msg["save_path"], "wb") as f:
+                f.write(msg["buf"].tobytes())
+        print(f"IO writer {self.qid} is done.")